@@ -0,0 +1,8 @@
+# إعدادات gunicorn: تحميل التطبيق في العملية الأم ثم تهيئة الخطوط والمكتبات الثقيلة مرة واحدة،
+# فتتشاركها العمّال copy-on-write بدل أن يكررها كل عامل.
+preload_app = True
+
+
+def on_starting(server):
+    import app
+    app.warm_up()
@@ -0,0 +1,138 @@
+import os
+import sys
+
+# تجزئة كلمات المرور داخل الخيط نفسه (بدون process pool) أثناء الاختبارات
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+os.environ.setdefault("PASSWORD_HASH_METHOD", "pbkdf2:sha256:1000")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import app as sayarti
+
+
+def _reset_caches():
+    sayarti._pool_close_thread()
+    sayarti._dispose_engine()
+    sayarti._reports_cache.clear()
+    sayarti._lookup_cache.clear()
+    sayarti._nearest_cache.clear()
+    with sayarti._user_ctx_lock:
+        sayarti._user_ctx.clear()
+
+
+# PostgreSQL اختياري: TEST_DATABASE_URL لقاعدة اختبار فارغة (يُعاد إنشاء مخطط public فيها لكل اختبار)
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL", "").strip()
+BACKENDS = ["sqlite", "sqlalchemy", "postgresql"]
+
+
+def _build(monkeypatch, tmp_path, backend="sqlite"):
+    """قاعدة جديدة بالمخطط الكامل (كل الهجرات) وبيانات اصطناعية صغيرة على الـ backend المطلوب:
+    sqlite (sqlite3 مباشرة)، sqlalchemy (SQLite عبر DATABASE_URL)، postgresql (TEST_DATABASE_URL)."""
+    url = {"sqlite": "", "sqlalchemy": f"sqlite:///{tmp_path / 'sayarti.db'}", "postgresql": TEST_DATABASE_URL}[backend]
+    if backend == "postgresql" and not url:
+        pytest.skip("TEST_DATABASE_URL not set")
+    monkeypatch.setattr(sayarti, "DB_PATH", str(tmp_path / "sayarti.db"))
+    monkeypatch.setattr(sayarti, "DATABASE_URL", url)
+    monkeypatch.setattr(sayarti, "DB_DIALECT", sayarti._db_dialect(url))
+    monkeypatch.setattr(sayarti, "FTS_ENABLED", False)
+    monkeypatch.setattr(sayarti, "_migrated_once", True)
+    monkeypatch.setattr(sayarti, "_data_epoch_version", None)
+    _reset_caches()
+    if backend == "postgresql":
+        with sayarti._engine().begin() as con:
+            con.exec_driver_sql("DROP SCHEMA public CASCADE")
+            con.exec_driver_sql("CREATE SCHEMA public")
+    with sayarti.app.app_context():
+        sayarti.init_db()
+        sayarti.ensure_admin()
+        sayarti._apply_light_migrations()
+        sayarti._seed_synthetic(sayarti.get_db(), 6, 3, 3000, 3)
+    return sayarti
+
+
+@pytest.fixture
+def fleet(tmp_path, monkeypatch):
+    yield _build(monkeypatch, tmp_path)
+    _reset_caches()
+
+
+@pytest.fixture(scope="module", params=BACKENDS)
+def any_backend(request, tmp_path_factory):
+    """نفس fleet على كل backend، قاعدة واحدة لكل وحدة اختبار (الاختبارات تقارن بالبيانات الحالية)؛
+    postgresql يُتخطّى بدون TEST_DATABASE_URL."""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        yield _build(monkeypatch, tmp_path_factory.mktemp(request.param), request.param)
+        _reset_caches()
+
+
+def login_as(client, user_id):
+    """جلسة مستخدم مباشرة (بدون POST /login وحدود المحاولات)."""
+    with sayarti.app.app_context():
+        pwhash = sayarti.get_db().execute("SELECT password_hash FROM users WHERE id=?", (user_id,)).fetchone()[0]
+    with client.session_transaction() as sess:
+        sess["user_id"] = user_id
+        sess["auth_hash"] = sayarti._session_auth_hash(pwhash)
+
+
+def busiest_owner(db):
+    return db.execute("""SELECT owner_id FROM cars WHERE owner_id IS NOT NULL
+                         GROUP BY owner_id ORDER BY COUNT(*) DESC, owner_id LIMIT 1""").fetchone()[0]
+
+
+def admin_id(db):
+    return db.execute("SELECT id FROM users WHERE role='admin' ORDER BY id LIMIT 1").fetchone()[0]
+
+
+_CENTERS = ["بترومين", "الوكالة", "مركز الجميح", "ورشة أبو خالد", "", None]
+_NOTES = ["", None, "تم التغيير مع الفلتر", "بحاجة متابعة", "فاتورة رقم 4521", "إطارات أمامية"]
+
+
+def _random_date(rnd):
+    return None if rnd.random() < 0.05 else f"{rnd.randint(2021, 2026)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}"
+
+
+def scramble(db, rnd, steps=300):
+    """كتابات عشوائية على cars و maintenance (إضافة/تعديل كل عمود/حذف، نقل ملكية، حذف سيارة)
+    حتى تعمل كل الـ triggers؛ الاختبارات تقارن جداول الملخص بعدها بإعادة البناء من الصفر."""
+    types = [r[0] for r in db.execute("SELECT name FROM maintenance_types")] + [None]
+    owners = [r[0] for r in db.execute("SELECT id FROM users")] + [None]
+
+    def pick(sql):
+        row = db.execute(sql + " ORDER BY random() LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    for _ in range(steps):
+        op = rnd.random()
+        car = pick("SELECT id FROM cars")
+        maint = pick("SELECT id FROM maintenance")
+        if op < 0.35 and car:
+            db.execute("""INSERT INTO maintenance (maintenance_date, car_id, maintenance_type, mileage, cost,
+                                                   service_center, notes, next_maintenance_date, created_by)
+                          VALUES (?,?,?,?,?,?,?,?,?)""",
+                       (_random_date(rnd), car, rnd.choice(types), rnd.randint(1000, 200000),
+                        None if rnd.random() < 0.05 else round(rnd.uniform(50, 3000), 2),
+                        rnd.choice(_CENTERS), rnd.choice(_NOTES), _random_date(rnd), 1))
+        elif op < 0.65 and maint:
+            col, value = rnd.choice([
+                ("maintenance_date", _random_date(rnd)), ("cost", round(rnd.uniform(50, 3000), 2)),
+                ("maintenance_type", rnd.choice(types)), ("car_id", car),
+                ("service_center", rnd.choice(_CENTERS)), ("notes", rnd.choice(_NOTES)),
+                ("next_maintenance_date", _random_date(rnd)),
+            ])
+            db.execute(f"UPDATE maintenance SET {col}=? WHERE id=?", (value, maint))
+        elif op < 0.8 and maint:
+            db.execute("DELETE FROM maintenance WHERE id=?", (maint,))
+        elif op < 0.88 and car:
+            db.execute("UPDATE cars SET owner_id=? WHERE id=?", (rnd.choice(owners), car))
+        elif op < 0.93 and car:
+            db.execute("UPDATE cars SET car_type=?, model=? WHERE id=?",
+                       (rnd.choice(["تويوتا كامري", "هيونداي النترا", "فورد إكسبلورر"]), str(rnd.randint(2010, 2025)), car))
+        elif op < 0.97:
+            db.execute("INSERT INTO cars (car_type, model, owner_id, created_by) VALUES (?,?,?,?)",
+                       ("كيا سيراتو", "2020", rnd.choice(owners), 1))
+        elif car:
+            db.execute("DELETE FROM cars WHERE id=?", (car,))
+        if rnd.random() < 0.1:
+            db.commit()
+    db.commit()
@@ -0,0 +1,96 @@
+"""كاش سياق المستخدم: أي إجراء إداري أو تغيير كلمة مرور يسري من الطلب التالي للمستخدم المعني،
+على كل backend (مع DATABASE_URL يأتي الـ epoch من جدول auth_epoch لا من ملف بجانب SQLite)."""
+import itertools
+
+import pytest
+
+from conftest import admin_id, login_as
+
+_seq = itertools.count()
+
+
+def _make_user(app, role="user", password="secret-1"):
+    with app.app.app_context():
+        db = app.get_db()
+        uid = db.execute("""INSERT INTO users (name, email, password_hash, role, is_approved, is_active, created_at)
+                            VALUES (?,?,?,?,1,1,?) RETURNING id""",
+                         ("مستخدم", f"b{next(_seq)}@test.local", app._hash_password(password), role,
+                          app.datetime.now().isoformat())).fetchone()[0]
+        db.commit()
+    return uid
+
+
+@pytest.fixture
+def admin(any_backend):
+    client = any_backend.app.test_client()
+    with any_backend.app.app_context():
+        login_as(client, admin_id(any_backend.get_db()))
+    return client
+
+
+def _session(app, uid):
+    client = app.app.test_client()
+    login_as(client, uid)
+    assert client.get("/").status_code == 200  # يملأ الكاش قبل الإجراء
+    return client
+
+
+def _act(admin, action, uid):
+    assert admin.post("/admin/users", data={"action": action, "user_id": str(uid)}).status_code == 302
+
+
+@pytest.mark.parametrize("action", ["suspend", "delete", "reject", "resetpwd"])
+def test_admin_action_ends_session_on_next_request(any_backend, admin, action):
+    uid = _make_user(any_backend)
+    client = _session(any_backend, uid)
+    _act(admin, action, uid)
+    resp = client.get("/")
+    assert resp.status_code == 302 and resp.location.endswith("/login")
+
+
+def test_demote_removes_admin_access_on_next_request(any_backend, admin):
+    uid = _make_user(any_backend, role="admin")
+    client = _session(any_backend, uid)
+    assert client.get("/admin/users").status_code == 200
+    _act(admin, "demote", uid)
+    resp = client.get("/admin/users")
+    assert resp.status_code == 302 and resp.location.endswith("/")
+    assert client.get("/").status_code == 200
+
+
+def test_promote_and_activate_take_effect(any_backend, admin):
+    uid = _make_user(any_backend)
+    client = _session(any_backend, uid)
+    assert client.get("/admin/users").status_code == 302
+    _act(admin, "promote", uid)
+    assert client.get("/admin/users").status_code == 200
+    _act(admin, "suspend", uid)
+    assert client.get("/").status_code == 302
+    _act(admin, "activate", uid)
+    login_as(client, uid)
+    assert client.get("/").status_code == 200
+
+
+def test_password_change_keeps_this_session_and_ends_others(any_backend):
+    uid = _make_user(any_backend, password="old-pass-1")
+    this, other = _session(any_backend, uid), _session(any_backend, uid)
+    resp = this.post("/account/password", data={"current": "old-pass-1", "new1": "new-pass-2", "new2": "new-pass-2"})
+    assert resp.status_code == 302 and resp.location.endswith("/")
+    assert this.get("/").status_code == 200
+    resp = other.get("/")
+    assert resp.status_code == 302 and resp.location.endswith("/login")
+
+
+def test_server_database_epoch_needs_no_local_file(any_backend, admin):
+    """عامل على جهاز آخر لا يرى ملف .auth-epoch: مع DATABASE_URL يكفي ما في القاعدة."""
+    if not any_backend.DATABASE_URL:
+        pytest.skip("file epoch on plain SQLite")
+    uid = _make_user(any_backend)
+    client = _session(any_backend, uid)
+    with any_backend.app.app_context():
+        db = any_backend.get_db()
+        db.execute("UPDATE users SET is_active=0 WHERE id=?", (uid,))
+        any_backend._bump_user_auth(db, uid)
+        db.commit()  # بدون _touch_auth_epoch
+    resp = client.get("/")
+    assert resp.status_code == 302 and resp.location.endswith("/login")
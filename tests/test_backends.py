@@ -0,0 +1,191 @@
+"""التقارير، التصدير ولوحة التحكم على كل backend: sqlite3، SQLite عبر SQLAlchemy، و PostgreSQL
+(الأخير مع TEST_DATABASE_URL فقط، مثل postgresql://user@localhost/sayarti_test)."""
+import csv
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pytest
+
+from conftest import admin_id, busiest_owner, login_as
+
+FILTERS = [
+    "",
+    "&from=2024-01-01&to=2024-12-31",
+    "&from=2024-02-10&to=2024-05-20",
+    "&qf=this_month",
+    "&qf=last_30d",
+    "&type=كفرات",
+    "&sc=الوكالة",
+    "&q=فاتورة",
+]
+
+
+@pytest.fixture(params=["admin", "user"])
+def client(request, any_backend, monkeypatch):
+    monkeypatch.setattr(any_backend, "EXPORT_JOBS_IN_PROCESS", False)
+    monkeypatch.setattr(any_backend, "REPORTS_PAGE_SIZE", 40)
+    client = any_backend.app.test_client()
+    with any_backend.app.app_context():
+        db = any_backend.get_db()
+        client.uid = admin_id(db) if request.param == "admin" else busiest_owner(db)
+    client.role = request.param
+    login_as(client, client.uid)
+    return client
+
+
+def _expected(app, client, filters):
+    """العدد والمجموع من الجداول الأصلية بنفس الفلاتر (مرجع مستقل عن المسارات المحسّنة)."""
+    with app.app.test_request_context("/reports?group=none" + filters):
+        from flask import g
+        g.user = {"id": client.uid, "role": client.role}
+        cond, params = app._reports_base_filters(client.uid)
+        row = app.get_db().execute(f"""
+            SELECT COUNT(*), COALESCE(SUM(m.cost),0) FROM maintenance m JOIN cars c ON c.id = m.car_id
+             WHERE {" AND ".join(cond)}""", tuple(params)).fetchone()
+        return row[0], round(float(row[1]), 2)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+@pytest.mark.parametrize("group", ["car", "month", "type", "none"])
+def test_reports(any_backend, client, group, filters):
+    assert client.get(f"/reports?group={group}{filters}").status_code == 200
+    data = client.get(f"/api/reports?group={group}{filters}").get_json()
+    count, total = _expected(any_backend, client, filters)
+    assert data["count"] == count
+    assert data["total_cost"] == pytest.approx(total, abs=0.05)
+    if group != "none":
+        assert sum(r["count"] for r in data["rows"]) == count
+
+
+def test_detailed_keyset_pages(any_backend, client):
+    url = "/api/reports?group=none&from=2023-01-01&to=2025-12-31"
+    first = client.get(url).get_json()
+    seen, page, pages = [], first, []
+    while True:
+        pages.append(page)
+        seen += [(r["date"], r["id"]) for r in page["rows"]]
+        if not page["next_cursor"]:
+            break
+        page = client.get(f"{url}&after={page['next_cursor']}").get_json()
+    back = client.get(f"{url}&before={pages[-1]['prev_cursor']}").get_json() if len(pages) > 1 else None
+    assert len(seen) == len(set(seen)) == first["count"]
+    assert seen == sorted(seen, key=lambda k: (k[0] or "", k[1]), reverse=True)
+    if back:
+        assert [r["id"] for r in back["rows"]] == [r["id"] for r in pages[-2]["rows"]]
+
+
+@pytest.mark.parametrize("group", ["car", "none"])
+def test_csv_export(any_backend, client, group):
+    resp = client.get(f"/reports/export?fmt=csv&group={group}&from=2024-01-01&to=2024-12-31")
+    assert resp.status_code == 200
+    rows = list(csv.reader(io.StringIO(resp.get_data(as_text=True))))
+    count, total = _expected(any_backend, client, "&from=2024-01-01&to=2024-12-31")
+    if group == "none":
+        assert len(rows) - 1 == count
+    else:
+        assert sum(int(r[1]) for r in rows[1:]) == count
+        assert sum(float(r[2]) for r in rows[1:]) == pytest.approx(total, abs=0.05)
+
+
+def test_pdf_export(client):
+    resp = client.get("/reports/export?fmt=pdf&group=month&qf=last_30d")
+    assert resp.status_code == 200
+    assert resp.data.startswith(b"%PDF")
+
+
+def test_async_export_job(any_backend, client):
+    resp = client.get("/reports/export?fmt=csv&group=type&async=1", headers={"Accept": "application/json"})
+    assert resp.status_code == 202
+    job = resp.get_json()
+    any_backend._drain_export_jobs()
+    status = client.get(job["status_url"] + "?format=json").get_json()
+    assert status["status"] == "done", status
+    download = client.get(status["download_url"])
+    assert download.status_code == 200
+    assert download.data.decode("utf-8").splitlines()[0] == "group,count,total"
+
+
+def test_concurrent_claims_respect_the_shared_limit(any_backend, monkeypatch):
+    """عدة عمّال يحجزون في نفس اللحظة: لا تُحجز مهمة مرتين ولا يتجاوز الجاري EXPORT_JOB_CONCURRENCY."""
+    monkeypatch.setattr(any_backend, "EXPORT_JOB_CONCURRENCY", 3)
+    with any_backend.app.app_context():
+        db = any_backend.get_db()
+        uid = admin_id(db)
+        db.executemany("INSERT INTO export_jobs (id, user_id, path, status, created_at) VALUES (?,?,?,?,?)",
+                       [(f"claim-{i}", uid, "/reports/export", "queued", i) for i in range(10)])
+        db.commit()
+    barrier = threading.Barrier(8)
+
+    def claim():
+        con = any_backend._jobs_connect()
+        try:
+            barrier.wait()
+            job = any_backend._claim_export_job(con)
+            return job["id"] if job else None
+        finally:
+            con.close()
+
+    with ThreadPoolExecutor(8) as pool:
+        claimed = [j for j in pool.map(lambda _: claim(), range(8)) if j]
+    try:
+        assert len(claimed) == len(set(claimed)) == 3
+        with any_backend.app.app_context():
+            running = any_backend.get_db().execute(
+                "SELECT COUNT(*) FROM export_jobs WHERE status='running'").fetchone()[0]
+        assert running == 3
+    finally:
+        with any_backend.app.app_context():
+            db = any_backend.get_db()
+            db.execute("DELETE FROM export_jobs WHERE id LIKE ?", ("claim-%",))
+            db.commit()
+
+
+def test_dashboard(any_backend, client):
+    resp = client.get("/")
+    assert resp.status_code == 200
+    with any_backend.app.app_context():
+        db = any_backend.get_db()
+        owner = None if client.role == "admin" else client.uid
+        today = date.today()
+        stats = any_backend._dashboard_stats(db, owner, today)
+        direct = any_backend._dashboard_stats_direct(db, owner, today)
+        sql, params = any_backend._upcoming_sql(owner, today, limit=200)
+        upcoming = db.execute(sql, tuple(params)).fetchall()
+    assert stats["cars"] == direct["cars"]
+    assert stats["maint"] == direct["maint"]
+    assert stats["amount_month"] == pytest.approx(direct["amount_month"], abs=0.05)
+    assert stats["nearest_next"] == direct["nearest_next"]
+    assert [r["due_date"] for r in upcoming] == sorted(r["due_date"] for r in upcoming)
+
+
+@pytest.mark.parametrize("path", ["/manage", "/manage?q=تويوتا&sort=model&dir=asc", "/maintenance/add", "/maintenance/import",
+                                  "/cars/add", "/export/upcoming30.csv", "/export/upcoming30.pdf"])
+def test_pages(client, path):
+    assert client.get(path).status_code == 200
+
+
+@pytest.mark.parametrize("path", ["/admin/users", "/admin/users?status=active&q=fleet&sort=last_login",
+                                  "/admin/users/lookup?q=fleet&page=2"])
+def test_admin_pages(client, path):
+    resp = client.get(path)
+    if client.role == "admin":
+        assert resp.status_code == 200
+    else:
+        assert resp.status_code == 302 and resp.location.endswith("/")
+
+
+def test_add_maintenance_updates_reports(any_backend, client):
+    url = "/api/reports?group=type&qf=this_month"
+    before = client.get(url).get_json()
+    with any_backend.app.app_context():
+        db = any_backend.get_db()
+        car = db.execute("SELECT id FROM cars WHERE owner_id=? ORDER BY id LIMIT 1", (busiest_owner(db),)).fetchone()[0]
+    resp = client.post("/maintenance/add", data={"car_id": str(car), "maintenance_type": "كفرات", "cost": "123.5",
+                                                 "service_center": "ورشة جديدة", "next_maintenance_date": "2099-01-01"})
+    assert resp.status_code == 302
+    after = client.get(url).get_json()
+    assert after["count"] == before["count"] + 1
+    assert after["total_cost"] == pytest.approx(before["total_cost"] + 123.5, abs=0.05)
+    assert "ورشة جديدة" in client.get("/reports").get_data(as_text=True)
@@ -0,0 +1,66 @@
+"""تعديل السيارات وصفحة الإدارة: غير المالك لا يرى ولا يعدّل سيارة غيره."""
+import pytest
+
+from conftest import admin_id, busiest_owner, login_as
+
+
+def _foreign_car(db, owner):
+    return db.execute("SELECT * FROM cars WHERE owner_id NOT IN (?, ?) ORDER BY id LIMIT 1",
+                      (owner, admin_id(db))).fetchone()
+
+
+def _car(fleet, car_id):
+    with fleet.app.app_context():
+        return tuple(fleet.get_db().execute("SELECT car_type, model, owner_id FROM cars WHERE id=?", (car_id,)).fetchone())
+
+
+@pytest.mark.parametrize("method", ["get", "post"])
+def test_non_owner_cannot_open_or_edit_a_car(fleet, method):
+    client = fleet.app.test_client()
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        owner = busiest_owner(db)
+        car = _foreign_car(db, owner)
+    before = _car(fleet, car["id"])
+    login_as(client, owner)
+    form = {"car_type": "مسروقة", "model": "X", "owner_id": str(owner)}
+    resp = getattr(client, method)(f"/cars/edit/{car['id']}", **({"data": form} if method == "post" else {}))
+    assert resp.status_code == 404
+    assert _car(fleet, car["id"]) == before
+
+
+def test_owner_edits_own_car_but_cannot_reassign_it(fleet):
+    client = fleet.app.test_client()
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        owner = busiest_owner(db)
+        car_id = db.execute("SELECT id FROM cars WHERE owner_id=? ORDER BY id LIMIT 1", (owner,)).fetchone()[0]
+        other = _foreign_car(db, owner)["owner_id"]
+    login_as(client, owner)
+    assert client.get(f"/cars/edit/{car_id}").status_code == 200
+    resp = client.post(f"/cars/edit/{car_id}", data={"car_type": "تويوتا", "model": "معدّلة", "owner_id": str(other)})
+    assert resp.status_code == 302
+    assert _car(fleet, car_id) == ("تويوتا", "معدّلة", owner)
+
+
+def test_admin_can_reassign_a_car(fleet):
+    client = fleet.app.test_client()
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        owner = busiest_owner(db)
+        car = _foreign_car(db, owner)
+        login_as(client, admin_id(db))
+    resp = client.post(f"/cars/edit/{car['id']}", data={"car_type": car["car_type"], "model": car["model"],
+                                                         "owner_id": str(owner)})
+    assert resp.status_code == 302
+    assert _car(fleet, car["id"])[2] == owner
+
+
+def test_manage_lists_maintenance_types(fleet):
+    client = fleet.app.test_client()
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        login_as(client, admin_id(db))
+        names = [r[0] for r in db.execute("SELECT name FROM maintenance_types").fetchall()]
+    page = client.get("/manage").get_data(as_text=True)
+    assert names and all(name in page for name in names)
@@ -0,0 +1,141 @@
+"""مهام التصدير في الخلفية: الحجز عند الإرسال وعند انتهاء كل مهمة، الحد المشترك، المهلة
+وحذف النتائج المتأخرة."""
+import os
+import threading
+import time
+
+import pytest
+
+from conftest import busiest_owner, login_as
+
+EXPORT_URL = "/reports/export?fmt=csv&group=type&async=1"
+
+
+@pytest.fixture
+def client(fleet, tmp_path, monkeypatch):
+    monkeypatch.setattr(fleet, "EXPORT_JOBS_DIR", str(tmp_path / "exports"))
+    monkeypatch.setattr(fleet, "EXPORT_JOBS_IN_PROCESS", True)
+    monkeypatch.setattr(fleet, "EXPORT_JOB_WORKERS", 1)
+    monkeypatch.setattr(fleet, "EXPORT_JOB_CONCURRENCY", 1)
+    monkeypatch.setattr(fleet, "_export_pool", None)
+    client = fleet.app.test_client()
+    with fleet.app.app_context():
+        login_as(client, busiest_owner(fleet.get_db()))
+    yield client
+    if fleet._export_pool is not None:
+        fleet._export_pool.shutdown(wait=True)
+
+
+def _submit(client):
+    resp = client.get(EXPORT_URL, headers={"Accept": "application/json"})
+    assert resp.status_code == 202
+    return resp.get_json()["job_id"]
+
+
+def _job(app, job_id):
+    with app.app.app_context():
+        return dict(app.get_db().execute("SELECT * FROM export_jobs WHERE id=?", (job_id,)).fetchone())
+
+
+def _wait(app, job_id, timeout=15):
+    """ينتظر انتهاء المهمة بقراءة الجدول مباشرة (بدون صفحة الحالة التي تحجز المنتظر)."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = _job(app, job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} still {job['status']}")
+
+
+def test_queued_jobs_run_on_completion_without_polling(fleet, client, monkeypatch):
+    monkeypatch.setattr(fleet, "EXPORT_JOB_WORKERS", 2)
+    real, lock, active, peak = fleet._render_export_job, threading.Lock(), [0], [0]
+
+    def tracked(job, out, cancel):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        try:
+            time.sleep(0.05)
+            return real(job, out, cancel)
+        finally:
+            with lock:
+                active[0] -= 1
+
+    monkeypatch.setattr(fleet, "_render_export_job", tracked)
+    ids = [_submit(client) for _ in range(4)]
+    assert [_wait(fleet, i)["status"] for i in ids] == ["done"] * 4
+    assert peak[0] == 1  # EXPORT_JOB_CONCURRENCY رغم خيطين في الـ pool
+    download = client.get(f"/exports/{ids[-1]}/download")
+    assert download.status_code == 200 and download.data.decode("utf-8").startswith("group,count,total")
+
+
+def test_timeout_frees_the_slot_and_discards_the_late_result(fleet, client, monkeypatch):
+    monkeypatch.setattr(fleet, "EXPORT_JOB_TIMEOUT", 1)
+    real, release, stuck = fleet._render_export_job, threading.Event(), []
+
+    def slow_first(job, out, cancel):
+        if not stuck:
+            stuck.append(job["id"])
+            release.wait(10)
+        return real(job, out, cancel)
+
+    monkeypatch.setattr(fleet, "_render_export_job", slow_first)
+    first, second = _submit(client), _submit(client)
+    # خيط العامل الوحيد لم يبقَ عالقًا مع الرسم: الثانية تنتهي والأولى ما زالت ترسم
+    assert _wait(fleet, second)["status"] == "done"
+    job = _job(fleet, first)
+    assert (job["status"], job["error"]) == ("failed", "timeout")
+    render = next(t for t in threading.enumerate() if t.name == f"export-render-{first}")
+    release.set()
+    render.join(10)
+    assert _job(fleet, first)["status"] == "failed"
+    assert not os.path.exists(os.path.join(fleet.EXPORT_JOBS_DIR, f"{first}.bin"))
+    assert os.path.exists(_job(fleet, second)["file_path"])
+
+
+def test_result_is_discarded_if_another_worker_timed_the_job_out(fleet, client, monkeypatch):
+    real = fleet._render_export_job
+
+    def swept(job, out, cancel):
+        result = real(job, out, cancel)
+        with fleet.app.app_context():  # sweeper عامل آخر أثناء الرسم
+            db = fleet.get_db()
+            db.execute("UPDATE export_jobs SET status='failed', error='timeout' WHERE id=?", (job["id"],))
+            db.commit()
+        return result
+
+    monkeypatch.setattr(fleet, "_render_export_job", swept)
+    job_id = _submit(client)
+    _wait(fleet, job_id)
+    fleet._export_pool.shutdown(wait=True)  # حتى ينهي خيط العامل تسجيل النتيجة
+    job = _job(fleet, job_id)
+    assert (job["status"], job["error"], job["file_path"]) == ("failed", "timeout", None)
+    assert not os.path.exists(os.path.join(fleet.EXPORT_JOBS_DIR, f"{job_id}.bin"))
+
+
+def test_failed_job_does_not_stop_the_queue(fleet, client, monkeypatch):
+    real, calls = fleet._render_export_job, []
+
+    def first_fails(job, out, cancel):
+        calls.append(job["id"])
+        if len(calls) == 1:
+            raise RuntimeError("renderer crashed")
+        return real(job, out, cancel)
+
+    monkeypatch.setattr(fleet, "_render_export_job", first_fails)
+    first, second = _submit(client), _submit(client)
+    assert _wait(fleet, second)["status"] == "done"
+    job = _job(fleet, first)
+    assert (job["status"], job["error"]) == ("failed", "renderer crashed")
+
+
+def test_cancelled_stream_stops_writing(fleet, tmp_path):
+    job = {"id": "x", "user_id": None, "path": "/reports/export?fmt=csv&group=none"}
+    with fleet.app.app_context():
+        job["user_id"] = busiest_owner(fleet.get_db())
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(fleet._ExportCancelled):
+        fleet._render_export_job(job, str(tmp_path / "x.bin"), cancel)
@@ -0,0 +1,59 @@
+"""maintenance_fts المحدَّث بالـ triggers يطابق إعادة البناء، والبحث به يطابق LIKE على النص الموحَّد."""
+import random
+
+import pytest
+
+from conftest import scramble
+
+_FTS_COLS = "rowid, service_center, notes, maintenance_type, car_label"
+
+
+def _fts_rows(db):
+    return sorted(tuple(r) for r in db.execute(f"SELECT {_FTS_COLS} FROM maintenance_fts").fetchall())
+
+
+@pytest.fixture
+def fts(fleet):
+    if not fleet.FTS_ENABLED:
+        pytest.skip("SQLite built without FTS5")
+    return fleet
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_fts_matches_rebuild_after_random_writes(fts, seed):
+    with fts.app.app_context():
+        db = fts.get_db()
+        scramble(db, random.Random(seed))
+        live = _fts_rows(db)
+        fts._rebuild_maintenance_fts(db)
+        assert live == _fts_rows(db)
+        db.rollback()
+
+
+def test_fts_folds_arabic_variants(fts):
+    with fts.app.app_context():
+        db = fts.get_db()
+        car = db.execute("SELECT id FROM cars ORDER BY id LIMIT 1").fetchone()[0]
+        cur = db.execute("INSERT INTO maintenance (maintenance_date, car_id, maintenance_type, notes) VALUES (?,?,?,?)",
+                         ("2025-01-05", car, "كفرات", "تغيير إطارات أماميّة"))
+        db.commit()
+        for text in ("اطارات", "إطارات امامية", "أمامي"):
+            ids = [r[0] for r in db.execute("SELECT rowid FROM maintenance_fts WHERE maintenance_fts MATCH ?",
+                                            (fts._fts_match(text),))]
+            assert cur.lastrowid in ids, text
+
+
+@pytest.mark.parametrize("word", ["فلتر", "متابعة", "فاتورة", "الجميح"])
+def test_fts_search_matches_like(fts, word):
+    with fts.app.app_context():
+        db = fts.get_db()
+        scramble(db, random.Random(5))
+        fold = fts._ar_fold_sql
+        expected = {r[0] for r in db.execute(f"""
+            SELECT m.id FROM maintenance m
+             WHERE ' ' || {fold("m.service_center")} || ' ' || {fold("m.notes")} || ' ' || {fold("m.maintenance_type")}
+                   || ' ' || {fold("(SELECT car_type || ' ' || model FROM cars WHERE id = m.car_id)")} LIKE ?
+        """, (f"% {fts._ar_fold(word)}%",))}
+        found = {r[0] for r in db.execute("SELECT rowid FROM maintenance_fts WHERE maintenance_fts MATCH ?",
+                                          (fts._fts_match(word),))}
+        assert expected and found == expected
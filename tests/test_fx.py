@@ -0,0 +1,108 @@
+"""أسعار الصرف لا تنتظر الشبكة: الطلب يرجع فورًا بالسعر المحفوظ أو الاحتياطي، والجلب في خيط خلفي."""
+import threading
+import time
+
+import pytest
+
+from conftest import busiest_owner, login_as
+
+URL = "/api/reports?group=type&currency=USD"
+PAIR = ("SAR", "USD")
+
+
+@pytest.fixture
+def client(fleet, monkeypatch):
+    monkeypatch.setattr(fleet, "_fx_cache", {})
+    monkeypatch.setattr(fleet, "_fx_inflight", set())
+    monkeypatch.setattr(fleet, "_fx_backoff", {})
+    client = fleet.app.test_client()
+    with fleet.app.app_context():
+        login_as(client, busiest_owner(fleet.get_db()))
+    return client
+
+
+def _store(fleet, rate, age):
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        db.execute("INSERT INTO fx_rates (base, target, rate, fetched_at, lease_until) VALUES (?,?,?,?,0)",
+                   PAIR + (rate, time.time() - age))
+        db.commit()
+
+
+def _timed_get(client):
+    t0 = time.perf_counter()
+    resp = client.get(URL)
+    assert resp.status_code == 200
+    return resp.get_json()["fx_rate"], time.perf_counter() - t0
+
+
+def _join_refresh():
+    for t in threading.enumerate():
+        if t.name == "fx-SAR-USD":
+            t.join(10)
+
+
+def test_slow_fetch_returns_fallback_immediately(fleet, client, monkeypatch):
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    def slow_fetch(base, target):
+        calls.append((base, target))
+        started.set()
+        release.wait(10)
+        return 0.31
+
+    monkeypatch.setattr(fleet, "_fx_fetch", slow_fetch)
+    try:
+        rate, elapsed = _timed_get(client)
+        assert rate == fleet.FX_FALLBACK_RATES[PAIR]
+        assert elapsed < 2
+        assert started.wait(5)
+        rate, _ = _timed_get(client)  # التحديث ما زال جاريًا: لا خيط ثانٍ ولا انتظار
+        assert rate == fleet.FX_FALLBACK_RATES[PAIR] and calls == [PAIR]
+    finally:
+        release.set()
+        _join_refresh()
+    assert _timed_get(client)[0] == 0.31
+    with fleet.app.app_context():
+        assert fleet.get_db().execute("SELECT rate FROM fx_rates WHERE base=? AND target=?", PAIR).fetchone()[0] == 0.31
+
+
+def test_failing_fetch_keeps_serving_the_stale_rate(fleet, client, monkeypatch):
+    _store(fleet, 0.25, age=fleet.FX_TTL_SECONDS + 60)
+    calls = []
+
+    def broken_fetch(base, target):
+        calls.append((base, target))
+        raise ConnectionError("exchangerate.host unreachable")
+
+    monkeypatch.setattr(fleet, "_fx_fetch", broken_fetch)
+    rate, elapsed = _timed_get(client)
+    assert rate == 0.25 and elapsed < 2
+    _join_refresh()
+    for _ in range(3):
+        assert _timed_get(client)[0] == 0.25
+    assert calls == [PAIR]  # التأخير بعد الفشل يمنع إعادة المحاولة مع كل طلب
+    retry_at, delay = fleet._fx_backoff[PAIR]
+    assert delay == fleet.FX_RETRY_SECONDS and retry_at > time.time()
+
+
+def test_failing_fetch_without_any_rate_uses_the_fallback(fleet, client, monkeypatch):
+    def broken_fetch(base, target):
+        raise TimeoutError("read timed out")
+
+    monkeypatch.setattr(fleet, "_fx_fetch", broken_fetch)
+    assert _timed_get(client)[0] == fleet.FX_FALLBACK_RATES[PAIR]
+    _join_refresh()
+    assert _timed_get(client)[0] == fleet.FX_FALLBACK_RATES[PAIR]
+
+
+def test_fresh_stored_rate_is_used_without_fetching(fleet, client, monkeypatch):
+    _store(fleet, 0.27, age=10)
+
+    def no_fetch(base, target):
+        raise AssertionError("fresh rate must not trigger a fetch")
+
+    monkeypatch.setattr(fleet, "_fx_fetch", no_fetch)
+    assert _timed_get(client)[0] == 0.27
+    _join_refresh()
+    assert fleet._fx_cache[PAIR][0] == 0.27
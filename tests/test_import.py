@@ -0,0 +1,150 @@
+"""استيراد سجل الصيانة من CSV: أخطاء كل سطر، الدفعات، create_missing ونطاق المالك."""
+import io
+
+from conftest import admin_id, busiest_owner, login_as
+
+HEADER = "date,car,type,mileage,cost,service_center,notes,next_date\n"
+
+
+def _owner_car(db, owner):
+    r = db.execute("SELECT id, car_type, model FROM cars WHERE owner_id=? ORDER BY id LIMIT 1", (owner,)).fetchone()
+    return r["id"], f"{r['car_type']} - {r['model']}"
+
+
+def _a_type(db):
+    return db.execute("SELECT name FROM maintenance_types ORDER BY name LIMIT 1").fetchone()[0]
+
+
+def _count(db, notes):
+    return db.execute("SELECT COUNT(*) FROM maintenance WHERE notes=?", (notes,)).fetchone()[0]
+
+
+def test_validation_errors_name_their_lines(fleet):
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        owner = busiest_owner(db)
+        _, car = _owner_car(db, owner)
+        mtype = _a_type(db)
+        csv_text = HEADER + "\n".join([
+            f"2024-01-05,{car},{mtype},1000,150,مركز,imp-ok,2024-07-05",   # 2
+            f"05/01/2024,{car},{mtype},1000,150,مركز,imp-bad,",             # 3 تاريخ
+            f"2024-01-05,{car},,1000,150,مركز,imp-bad,",                    # 4 نوع فارغ
+            f"2024-01-05,{car},{mtype},-5,150,مركز,imp-bad,",               # 5 رقم سالب
+            f"2024-01-05,{car},{mtype},1000,abc,مركز,imp-bad,",             # 6 تكلفة
+            f"2024-01-05,{car},{mtype},1000,150,مركز,imp-bad,later",        # 7 next_date
+            f"2024-01-05,لا توجد - سيارة,{mtype},1000,150,مركز,imp-bad,",   # 8 سيارة
+            f"2024-01-05,{car},نوع جديد تماما,1000,150,مركز,imp-bad,",      # 9 نوع
+            "",
+            f"2024-02-05,{car},{mtype},\"1,200\",150,مركز,imp-ok,",         # 11
+        ]) + "\n"
+        res = fleet._import_maintenance_csv(db, io.StringIO(csv_text), owner, owner)
+        assert res["rows"] == 9 and res["inserted"] == 2
+        assert [line for line, _ in res["errors"]] == [3, 4, 5, 6, 7, 8, 9]
+        assert _count(db, "imp-ok") == 2 and _count(db, "imp-bad") == 0
+
+
+def test_missing_header_columns(fleet):
+    with fleet.app.app_context():
+        res = fleet._import_maintenance_csv(fleet.get_db(), io.StringIO("date,car\n2024-01-01,x\n"), 1)
+    assert res["inserted"] == 0 and res["errors"][0][0] == 1 and "type" in res["errors"][0][1]
+
+
+def test_failed_batch_keeps_good_rows_and_reports_each_line(fleet, monkeypatch):
+    """دفعة يرفض فيها المحرك صفًا: تُحفظ بقية صفوفها ويُنسب الخطأ لسطره لا لآخر سطر مقروء."""
+    monkeypatch.setattr(fleet, "IMPORT_BATCH_ROWS", 4)
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        db.execute("""CREATE TRIGGER test_reject_import BEFORE INSERT ON maintenance WHEN NEW.notes = 'imp-boom'
+                      BEGIN SELECT RAISE(ABORT, 'rejected'); END""")
+        db.commit()
+        owner = busiest_owner(db)
+        _, car = _owner_car(db, owner)
+        mtype = _a_type(db)
+        rows = [f"2024-03-{d:02d},{car},{mtype},1000,10,مركز,{'imp-boom' if d in (3, 9) else 'imp-batch'},"
+                for d in range(1, 11)]
+        res = fleet._import_maintenance_csv(db, io.StringIO(HEADER + "\n".join(rows) + "\n"), owner, owner)
+        assert res["inserted"] == 8 and _count(db, "imp-batch") == 8
+        assert [line for line, _ in res["errors"]] == [4, 10]
+        assert all("rejected" in msg for _, msg in res["errors"])
+
+
+def test_create_missing_creates_car_for_owner_and_type(fleet):
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        owner = busiest_owner(db)
+        csv_text = HEADER + "2024-04-01,جيب - رانجلر 2030,غسيل بخار,1000,80,مركز,imp-new,\n" \
+                            "2024-05-01,جيب - رانجلر 2030,غسيل بخار,2000,80,مركز,imp-new,\n" \
+                            "2024-05-01,بدون فاصل,غسيل بخار,2000,80,مركز,imp-new,\n"
+        res = fleet._import_maintenance_csv(db, io.StringIO(csv_text), owner, owner, create_missing=True)
+        assert (res["inserted"], res["cars_created"], res["types_created"]) == (2, 1, 1)
+        assert [line for line, _ in res["errors"]] == [4]
+        car = db.execute("SELECT id, owner_id FROM cars WHERE car_type='جيب' AND model='رانجلر 2030'").fetchone()
+        assert car["owner_id"] == owner
+        assert db.execute("SELECT COUNT(*) FROM maintenance WHERE car_id=? AND maintenance_type='غسيل بخار'",
+                          (car["id"],)).fetchone()[0] == 2
+
+
+def _foreign_car(db, owner):
+    """سيارة لمستخدم آخر بتسمية لا يملكها owner."""
+    other = db.execute("SELECT owner_id FROM cars WHERE owner_id NOT IN (?, ?) LIMIT 1",
+                       (owner, admin_id(db))).fetchone()[0]
+    car_id, _ = _owner_car(db, other)
+    db.execute("UPDATE cars SET model = model || ' فريد' WHERE id=?", (car_id,))
+    db.commit()
+    return other, _owner_car(db, other)[1]
+
+
+def test_import_matches_only_the_owners_cars(fleet):
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        owner = busiest_owner(db)
+        _, car = _foreign_car(db, owner)
+        res = fleet._import_maintenance_csv(db, io.StringIO(HEADER + f"2024-01-05,{car},{_a_type(db)},1,1,م,imp-x,\n"),
+                                            owner, owner)
+    assert res["inserted"] == 0 and "سيارة غير معروفة" in res["errors"][0][1]
+
+
+def _upload(client, text, **form):
+    data = {"file": (io.BytesIO(text.encode("utf-8")), "history.csv"), **form}
+    return client.post("/maintenance/import", data=data, content_type="multipart/form-data")
+
+
+def _flashes(client):
+    with client.session_transaction() as sess:
+        return [msg for _, msg in sess.pop("_flashes", [])]
+
+
+def test_web_import_requires_an_owner_for_admins(fleet):
+    client = fleet.app.test_client()
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        admin = admin_id(db)
+        owner = busiest_owner(db)
+        car_id, car = _owner_car(db, owner)
+        mtype = _a_type(db)
+    login_as(client, admin)
+    text = HEADER + f"2024-01-05,{car},{mtype},1000,150,مركز,imp-web,\n"
+    assert _upload(client, text).status_code == 200
+    assert _flashes(client) == ["يرجى اختيار مالك السيارات."]
+    _upload(client, text, owner_id="999999")
+    assert _flashes(client) == ["يرجى اختيار مالك السيارات."]
+    with fleet.app.app_context():
+        assert _count(fleet.get_db(), "imp-web") == 0
+    _upload(client, text, owner_id=str(owner))
+    with fleet.app.app_context():
+        rows = fleet.get_db().execute("SELECT car_id FROM maintenance WHERE notes='imp-web'").fetchall()
+    assert [r[0] for r in rows] == [car_id]
+
+
+def test_web_import_for_users_is_scoped_to_their_cars(fleet):
+    """owner_id من النموذج يُتجاهل لغير المشرف."""
+    client = fleet.app.test_client()
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        owner = busiest_owner(db)
+        other, car = _foreign_car(db, owner)
+        mtype = _a_type(db)
+    login_as(client, owner)
+    _upload(client, HEADER + f"2024-01-05,{car},{mtype},1000,150,مركز,imp-foreign,\n", owner_id=str(other))
+    with fleet.app.app_context():
+        assert _count(fleet.get_db(), "imp-foreign") == 0
@@ -0,0 +1,104 @@
+"""تسجيل الدخول: إعادة التجزئة بالمعاملات الحالية، حدود المحاولات (429 + Retry-After)،
+والرجوع إلى التجزئة داخل الخيط عند تعذّر الـ pool."""
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+PASSWORD = "secret-1"
+
+
+@pytest.fixture
+def user(fleet, monkeypatch):
+    """مستخدم معتمد بكلمة مرور معروفة، مع حدود محاولات جديدة لكل اختبار."""
+    monkeypatch.setattr(fleet, "_login_ip_limit", fleet._RateLimiter("30/60"))
+    monkeypatch.setattr(fleet, "_login_email_limit", fleet._RateLimiter("5/300"))
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        uid = db.execute("""INSERT INTO users (name, email, password_hash, role, is_approved, is_active, created_at)
+                            VALUES (?,?,?,?,1,1,?) RETURNING id""",
+                         ("مستخدم", "login@test.local", fleet._hash_password(PASSWORD), "user",
+                          fleet.datetime.now().isoformat())).fetchone()[0]
+        db.commit()
+    return uid
+
+
+def _login(fleet, email="login@test.local", password=PASSWORD, ip="10.0.0.1", client=None):
+    client = client or fleet.app.test_client()
+    return client.post("/login", data={"email": email, "password": password}, environ_base={"REMOTE_ADDR": ip})
+
+
+def _hash_of(fleet, uid):
+    with fleet.app.app_context():
+        return fleet.get_db().execute("SELECT password_hash FROM users WHERE id=?", (uid,)).fetchone()[0]
+
+
+def test_legacy_hash_is_upgraded_on_login(fleet, user):
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        db.execute("UPDATE users SET password_hash=? WHERE id=?",
+                   (generate_password_hash(PASSWORD, "pbkdf2:sha256:500"), user))
+        db.commit()
+    client = fleet.app.test_client()
+    assert _login(fleet, client=client).status_code == 302
+    new_hash = _hash_of(fleet, user)
+    assert new_hash.split("$", 1)[0] == fleet._hash_params() != "pbkdf2:sha256:500"
+    assert client.get("/").status_code == 200  # الجلسة الجديدة تحمل بصمة التجزئة الجديدة
+    assert _login(fleet).status_code == 302
+    assert _hash_of(fleet, user) == new_hash  # لا إعادة تجزئة عند المعاملات الحالية
+
+
+def test_account_limit_returns_429_with_retry_after(fleet, user):
+    for i in range(5):
+        assert _login(fleet, password="wrong", ip=f"10.0.1.{i}").status_code == 200
+    resp = _login(fleet, ip="10.0.2.1")  # حتى كلمة المرور الصحيحة ومن IP آخر
+    assert resp.status_code == 429
+    assert 0 < int(resp.headers["Retry-After"]) <= 300
+
+
+def test_successful_login_resets_the_account_counter(fleet, user):
+    for _ in range(4):
+        _login(fleet, password="wrong")
+    assert _login(fleet).status_code == 302
+    for _ in range(4):
+        _login(fleet, password="wrong")
+    assert _login(fleet).status_code == 302
+
+
+def test_ip_limit_counts_only_failures(fleet, user, monkeypatch):
+    monkeypatch.setattr(fleet, "_login_ip_limit", fleet._RateLimiter("3/60"))
+    for _ in range(10):
+        assert _login(fleet).status_code == 302  # مستخدمون كثيرون خلف NAT واحد
+    for i in range(3):
+        assert _login(fleet, email=f"nobody{i}@test.local", password="x").status_code == 200
+    resp = _login(fleet)
+    assert resp.status_code == 429
+    assert 0 < int(resp.headers["Retry-After"]) <= 60
+    assert _login(fleet, ip="10.0.0.2").status_code == 302
+
+
+class _BrokenPool:
+    def submit(self, fn, *args):
+        raise BrokenProcessPool("worker died")
+
+
+@pytest.mark.parametrize("failure", ["unavailable", "broken"])
+def test_login_hashes_inline_when_the_pool_fails(fleet, user, monkeypatch, failure):
+    monkeypatch.setattr(fleet, "PASSWORD_HASH_WORKERS", 2)
+    if failure == "unavailable":
+        def no_pool():
+            raise OSError("no forkserver")
+        monkeypatch.setattr(fleet, "_password_pool", no_pool)
+    else:
+        monkeypatch.setattr(fleet, "_password_pool", lambda: _BrokenPool())
+    assert _login(fleet).status_code == 302
+    assert _login(fleet, password="wrong").status_code == 200
+    assert fleet._pw_pool is None
+
+
+def test_login_returns_503_when_the_hash_queue_is_full(fleet, user, monkeypatch):
+    monkeypatch.setattr(fleet, "PASSWORD_HASH_WORKERS", 2)
+    monkeypatch.setattr(fleet, "_pw_slots", fleet.threading.BoundedSemaphore(1))
+    fleet._pw_slots.acquire()
+    resp = _login(fleet)
+    assert resp.status_code == 503 and resp.headers["Retry-After"] == "2"
@@ -0,0 +1,60 @@
+"""service_centers و lookup_version المحدَّثان بالـ triggers، وكاش _lookup المبني عليهما."""
+import random
+
+import pytest
+
+from conftest import scramble
+
+
+def _centers(db):
+    return sorted(tuple(r) for r in db.execute("SELECT name, cnt FROM service_centers").fetchall())
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_service_centers_match_rebuild_after_random_writes(fleet, seed):
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        scramble(db, random.Random(seed))
+        live = _centers(db)
+        fleet._rebuild_service_centers(db)
+        assert live == _centers(db)
+        db.rollback()
+
+
+def test_lookup_version_moves_only_with_lookup_data(fleet):
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        car = db.execute("SELECT id FROM cars ORDER BY id LIMIT 1").fetchone()[0]
+        center = db.execute("SELECT name FROM service_centers ORDER BY name LIMIT 1").fetchone()[0]
+
+        def bumped(sql, params=()):
+            before = fleet._lookup_version(db)
+            db.execute(sql, params)
+            db.commit()
+            return fleet._lookup_version(db) != before
+
+        add = "INSERT INTO maintenance (maintenance_date, car_id, cost, service_center) VALUES ('2025-02-01', ?, 100, ?)"
+        assert not bumped(add, (car, center))
+        assert not bumped(add, (car, ""))
+        assert not bumped("UPDATE maintenance SET cost = cost + 1 WHERE car_id=?", (car,))
+        assert bumped(add, (car, "ورشة جديدة"))
+        assert bumped("DELETE FROM maintenance WHERE service_center=?", ("ورشة جديدة",))
+        assert bumped("INSERT INTO maintenance_types (name) VALUES ('غسيل')")
+        assert bumped("INSERT INTO cars (car_type, model, owner_id) VALUES ('كيا', '2020', 1)")
+        assert bumped("UPDATE cars SET model='2021' WHERE id=?", (car,))
+
+
+def test_lookup_cache_sees_new_service_center(fleet):
+    with fleet.app.test_request_context("/"):
+        names = [r["service_center"] for r in fleet._lookup("service_centers")]
+        assert "ورشة جديدة" not in names
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        car = db.execute("SELECT id FROM cars ORDER BY id LIMIT 1").fetchone()[0]
+        db.execute("INSERT INTO maintenance (maintenance_date, car_id, service_center) VALUES ('2025-02-01', ?, ?)",
+                   (car, "ورشة جديدة"))
+        db.commit()
+    with fleet.app.test_request_context("/"):
+        names = [r["service_center"] for r in fleet._lookup("service_centers")]
+        assert "ورشة جديدة" in names
+        assert names == sorted(names)
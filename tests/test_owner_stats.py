@@ -0,0 +1,36 @@
+"""owner_stats و owner_month_spend المحدَّثان بالـ triggers يطابقان إعادة البناء."""
+import random
+
+import pytest
+
+from conftest import scramble
+
+
+def _stats(db):
+    # مالك فقد كل سياراته يبقى بصف أصفار؛ إعادة البناء لا تنشئه
+    return sorted(tuple(r) for r in db.execute(
+        "SELECT owner_id, car_count, maint_count FROM owner_stats WHERE car_count <> 0 OR maint_count <> 0"))
+
+
+def _spend(db):
+    return {(r[0], r[1]): round(r[2], 2) for r in db.execute("SELECT owner_id, month, total FROM owner_month_spend")
+            if round(r[2], 2) != 0}
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_owner_stats_match_rebuild_after_random_writes(fleet, seed):
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        scramble(db, random.Random(seed))
+        stats, spend = _stats(db), _spend(db)
+        fleet._rebuild_owner_stats(db)
+        assert stats == _stats(db)
+        assert spend == _spend(db)
+        db.rollback()
+
+
+def test_owner_stats_has_no_nearest_columns(fleet):
+    """أقرب موعد يتوقف على اليوم فيُحسب عند الطلب (_nearest_next) ولا يُخزَّن في الملخص."""
+    with fleet.app.app_context():
+        cols = [r[1] for r in fleet.get_db().execute("PRAGMA table_info(owner_stats)")]
+    assert cols == ["owner_id", "car_count", "maint_count"]
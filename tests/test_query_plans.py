@@ -0,0 +1,91 @@
+"""خطط الاستعلامات الساخنة: تقرير الفترة، لوحة التحكم (home) والمواعيد القادمة تقرأ من الفهارس."""
+from datetime import date
+
+import pytest
+from flask import g
+
+from conftest import admin_id, busiest_owner
+
+
+def _statements(db, fn):
+    """جمل SELECT التي نفّذها fn (بالقيم المربوطة) مع خطة كل منها."""
+    seen = []
+    db.set_trace_callback(seen.append)
+    try:
+        fn()
+    finally:
+        db.set_trace_callback(None)
+    plans = []
+    for sql in seen:
+        if sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            plans.append((sql, [r[3] for r in db.execute("EXPLAIN QUERY PLAN " + sql).fetchall()]))
+    assert plans, "no SELECT statements captured"
+    return plans
+
+
+def _find(plans, fragment):
+    found = [plan for sql, plan in plans if fragment in " ".join(sql.split())]
+    assert found, f"no statement containing {fragment!r}"
+    return found
+
+
+def _assert_index(plan, table, index):
+    steps = [s for s in plan if s.startswith(f"SEARCH {table} ")]
+    assert any(f"INDEX {index} " in s for s in steps), plan
+    assert not any(s.startswith(f"SCAN {table}") for s in plan), plan
+
+
+@pytest.mark.parametrize("role", ["admin", "user"])
+def test_reports_date_range_uses_index(fleet, role):
+    path = "/reports?group=none&from=2024-01-01&to=2024-03-31"
+    with fleet.app.test_request_context(path):
+        db = fleet.get_db()
+        uid = admin_id(db) if role == "admin" else busiest_owner(db)
+        g.user = {"id": uid, "role": role}
+        plans = _statements(db, lambda: fleet._reports_query_enhanced(uid, "none", paginate=True))
+        for plan in _find(plans, "FROM maintenance m JOIN cars c ON c.id = m.car_id"):
+            if role == "admin":
+                _assert_index(plan, "m", "idx_maintenance_date")
+            else:
+                _assert_index(plan, "c", "idx_cars_owner_id")
+                _assert_index(plan, "m", "idx_maintenance_car_date")
+
+
+@pytest.mark.parametrize("role", ["admin", "user"])
+def test_upcoming_uses_schedule_index(fleet, role):
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        owner = None if role == "admin" else busiest_owner(db)
+        sql, params = fleet._upcoming_sql(owner, date.today(), limit=200)
+        (_, plan), = _statements(db, lambda: db.execute(sql, tuple(params)).fetchall())
+        _assert_index(plan, "s", "idx_schedule_due" if owner is None else "idx_schedule_owner_due")
+
+
+@pytest.mark.parametrize("role", ["admin", "user"])
+def test_home_queries_use_indexes(fleet, role):
+    with fleet.app.test_request_context("/"):
+        db = fleet.get_db()
+        uid = admin_id(db) if role == "admin" else busiest_owner(db)
+        g.user = {"id": uid, "role": role}
+        fleet._nearest_cache.clear()
+        plans = _statements(db, lambda: fleet.home.__wrapped__())
+        for sql, plan in plans:
+            assert not any(s.startswith(("SCAN m", "SCAN s", "SCAN maintenance")) for s in plan), (sql, plan)
+        nearest, = _find(plans, "SELECT MIN(m.next_maintenance_date)")
+        if role == "admin":
+            _assert_index(nearest, "m", "idx_maintenance_next_date")
+        else:
+            _assert_index(nearest, "m", "idx_maintenance_car_type_date")
+
+
+def test_owner_detailed_page_sorts_in_temp_btree(fleet):
+    """حدّ معروف: maintenance بلا owner_id فصفحة المالك التفصيلية تُرتَّب بعد الجمع عبر سياراته
+    (USE TEMP B-TREE على صفوف الفترة فقط). إن تغيّر ذلك حدِّث README."""
+    path = "/reports?group=none&from=2024-01-01&to=2024-03-31"
+    with fleet.app.test_request_context(path):
+        db = fleet.get_db()
+        uid = busiest_owner(db)
+        g.user = {"id": uid, "role": "user"}
+        plans = _statements(db, lambda: fleet._reports_query_enhanced(uid, "none", paginate=True))
+        page, = _find(plans, "ORDER BY m.maintenance_date DESC")
+        assert "USE TEMP B-TREE FOR ORDER BY" in page
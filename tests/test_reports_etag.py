@@ -0,0 +1,107 @@
+"""ETag و 304 في /api/reports: يتغيّر فقط مع بيانات التقرير، والـ 304 بدون أي استعلام."""
+import pytest
+
+from conftest import admin_id, busiest_owner, login_as
+
+URL = "/api/reports?group=none"
+
+
+@pytest.fixture
+def client(fleet, monkeypatch):
+    monkeypatch.setattr(fleet, "EXPORT_JOBS_IN_PROCESS", False)  # المهمة تبقى queued؛ لا خيوط خلفية
+    client = fleet.app.test_client()
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        client.admin, client.owner = admin_id(db), busiest_owner(db)
+    login_as(client, client.admin)
+    return client
+
+
+def _revalidate(client, etag, url=URL):
+    return client.get(url, headers={"If-None-Match": etag})
+
+
+def _first(client, url=URL):
+    resp = client.get(url)
+    assert resp.status_code == 200
+    assert resp.headers["Cache-Control"] == "private, no-cache"
+    return resp.headers["ETag"].strip('"')
+
+
+def test_unchanged_data_gives_304_without_queries(client):
+    etag = _first(client)
+    resp = _revalidate(client, etag)
+    assert resp.status_code == 304
+    assert resp.data == b""
+    assert '"0 queries' in resp.headers["Server-Timing"]
+
+
+def test_fresh_fx_rate_keeps_304_off_the_database(client, fleet, monkeypatch):
+    monkeypatch.setitem(fleet._fx_cache, ("SAR", "USD"), (0.2667, fleet.time.time()))
+    url = URL + "&currency=USD"
+    etag = _first(client, url)
+    resp = _revalidate(client, etag, url)
+    assert resp.status_code == 304
+    assert '"0 queries' in resp.headers["Server-Timing"]
+
+
+def test_unrelated_writes_keep_etag(client, fleet):
+    etag = _first(client)
+    export = client.get("/reports/export?fmt=csv&group=none&async=1", headers={"Accept": "application/json"})
+    assert export.status_code == 202
+    assert client.get("/").status_code == 200
+    client.post("/login", data={"email": "admin@sayarti.local", "password": "admin123"})
+    login_as(client, client.admin)
+    assert _revalidate(client, etag).status_code == 304
+
+
+def test_maintenance_write_changes_etag(client, fleet):
+    etag = _first(client)
+    with fleet.app.app_context():
+        car = fleet.get_db().execute("SELECT id FROM cars ORDER BY id LIMIT 1").fetchone()[0]
+    resp = client.post("/maintenance/add", data={"car_id": str(car), "maintenance_type": "كفرات", "cost": "250"})
+    assert resp.status_code == 302
+    resp = _revalidate(client, etag)
+    assert resp.status_code == 200
+    assert resp.headers["ETag"].strip('"') != etag
+    assert _revalidate(client, resp.headers["ETag"].strip('"')).status_code == 304
+
+
+def test_etag_depends_on_user_and_args(client):
+    admin = _first(client)
+    assert _first(client, "/api/reports?group=month") != admin
+    login_as(client, client.owner)
+    assert _revalidate(client, admin).status_code == 200
+
+
+@pytest.mark.parametrize("qf", ["today", "this_week", "this_month", "last_30d"])
+def test_relative_quick_filter_changes_etag_with_the_date(client, fleet, monkeypatch, qf):
+    url = f"{URL}&qf={qf}"
+    etag = _first(client, url)
+    real = fleet.datetime
+
+    class Later(real):
+        @classmethod
+        def now(cls, tz=None):
+            return real.now(tz) + fleet.timedelta(days=40)
+
+    monkeypatch.setattr(fleet, "datetime", Later)
+    resp = _revalidate(client, etag, url)
+    assert resp.status_code == 200
+    assert resp.headers["ETag"].strip('"') != etag
+
+
+def test_write_bumps_epoch_before_the_response(fleet):
+    """الـ epoch يُلمس داخل الـ view (قبل إرسال الرد)، لا في teardown بعده."""
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        uid = busiest_owner(db)
+        car = db.execute("SELECT id FROM cars WHERE owner_id=? LIMIT 1", (uid,)).fetchone()[0]
+        pwhash = db.execute("SELECT password_hash FROM users WHERE id=?", (uid,)).fetchone()[0]
+    with fleet.app.test_request_context("/maintenance/add", method="POST",
+                                        data={"car_id": str(car), "maintenance_type": "كفرات", "cost": "10"}):
+        before = fleet._data_fingerprint()
+        fleet.session.update(user_id=uid, auth_hash=fleet._session_auth_hash(pwhash))
+        resp = fleet.app.full_dispatch_request()
+        assert resp.status_code == 302
+        assert fleet._data_fingerprint() != before
@@ -0,0 +1,52 @@
+"""maintenance_schedule المحدَّث بالـ triggers يطابق إعادة البناء، ويُبقي آخر صيانة فقط لكل (سيارة، نوع)."""
+import random
+
+import pytest
+
+from conftest import scramble
+
+_COLS = "car_id, maintenance_type, owner_id, maintenance_id, due_date"
+
+
+def _schedule(db):
+    return sorted(tuple(r) for r in db.execute(f"SELECT {_COLS} FROM maintenance_schedule").fetchall())
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_schedule_matches_rebuild_after_random_writes(fleet, seed):
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        scramble(db, random.Random(seed))
+        live = _schedule(db)
+        fleet._rebuild_maintenance_schedule(db)
+        assert live == _schedule(db)
+        db.rollback()
+
+
+def test_newer_record_supersedes_pending_due_date(fleet):
+    with fleet.app.app_context():
+        db = fleet.get_db()
+        car, owner = db.execute("SELECT id, owner_id FROM cars ORDER BY id LIMIT 1").fetchone()
+        add = ("INSERT INTO maintenance (maintenance_date, car_id, maintenance_type, next_maintenance_date) "
+               "VALUES (?,?,'غسيل',?) RETURNING id")
+
+        def due():
+            return db.execute("SELECT maintenance_id, due_date, owner_id FROM maintenance_schedule "
+                              "WHERE car_id=? AND maintenance_type='غسيل'", (car,)).fetchone()
+
+        first = db.execute(add, ("2025-01-10", car, "2025-04-10")).fetchone()[0]
+        assert tuple(due()) == (first, "2025-04-10", owner)
+        # سجل أقدم بموعد لا يحلّ محل الأحدث
+        db.execute(add, ("2024-06-01", car, "2024-09-01")).fetchone()
+        assert tuple(due()) == (first, "2025-04-10", owner)
+        # سجل أحدث بدون موعد قادم: الموعد السابق أُنجز فلا يبقى في الجدولة
+        latest = db.execute(add, ("2025-03-01", car, None)).fetchone()[0]
+        assert due() is None
+        # حذف الأحدث يعيد الموعد السابق
+        db.execute("DELETE FROM maintenance WHERE id=?", (latest,))
+        assert tuple(due()) == (first, "2025-04-10", owner)
+        db.execute("UPDATE cars SET owner_id=NULL WHERE id=?", (car,))
+        assert tuple(due()) == (first, "2025-04-10", None)
+        db.execute("DELETE FROM cars WHERE id=?", (car,))
+        assert due() is None
+        db.rollback()